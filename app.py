@@ -1,19 +1,46 @@
+import datetime
+import json
+import os
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
 import streamlit as st
 import pandas as pd
 import numpy as np
 from nba_api.stats.endpoints import LeagueDashPlayerStats, LeagueDashPlayerShotLocations
+from nba_api.library import http as nba_base_http
+from nba_api.stats.library import http as nba_http
+
+# decode nba.com payloads with orjson when available (~3x faster than the
+# stdlib json nba_api uses, noticeable on the wide shot-locations body)
+try:
+    import orjson
+
+    nba_base_http.json = SimpleNamespace(
+        loads=orjson.loads,
+        dumps=lambda obj, **kwargs: orjson.dumps(obj).decode(),
+    )
+except ImportError:
+    pass
 
 # -------------------------------
 # SETTINGS
 # -------------------------------
-TARGET_SEASON = "2025-26"
-SEASON_LABEL = "2025-26 Regular Season"
+# fallback if the season probe below cannot reach stats.nba.com
+DEFAULT_SEASON = "2025-26"
 
 # How often the app should re-pull data from NBA API (seconds)
 # 60 = every minute, 300 = every 5 minutes
 CACHE_TTL_SECONDS = 300
 
+# On-disk Parquet cache (survives worker restarts)
+CACHE_DIR = Path(".cache")
+
 st.set_page_config(
     page_title="NBA Shooting – NBA.com 2025-26",
     layout="wide"
@@ -26,13 +53,21 @@ st.set_page_config(
 # -------------------------------
 with st.sidebar:
     if st.button(" Refresh data now (pull latest)"):
+        # drop the on-disk layer too, or the loaders would serve the same
+        # Parquet files right back for anything younger than the TTL
+        for stale in CACHE_DIR.glob("*"):
+            try:
+                stale.unlink()
+            except OSError:
+                pass
         st.cache_data.clear()
         st.rerun()
 
 # -------------------------------
 # TEAM LOGOS + HEADSHOTS
 # -------------------------------
-TEAM_LOGOS = {
+# read-only views: one shared immutable mapping per constant across reruns
+TEAM_LOGOS = MappingProxyType({
     "ATL": "https://cdn.nba.com/logos/nba/1610612737/primary/L/logo.svg",
     "BOS": "https://cdn.nba.com/logos/nba/1610612738/primary/L/logo.svg",
     "BKN": "https://cdn.nba.com/logos/nba/1610612751/primary/L/logo.svg",
@@ -63,41 +98,142 @@ TEAM_LOGOS = {
     "TOR": "https://cdn.nba.com/logos/nba/1610612761/primary/L/logo.svg",
     "UTA": "https://cdn.nba.com/logos/nba/1610612762/primary/L/logo.svg",
     "WAS": "https://cdn.nba.com/logos/nba/1610612764/primary/L/logo.svg",
-}
+})
+
+# Point value per shot zone (anything missing is a 2-point zone)
+ZONE_PTS = MappingProxyType({
+    "Above_the_Break_3": 3,
+    "Left_Corner_3": 3,
+    "Right_Corner_3": 3,
+    "Corner_3": 3,
+    "Above the Break 3": 3,
+    "Left Corner 3": 3,
+    "Right Corner 3": 3,
+    "Corner 3": 3,
+})
 
 def get_team_logo(team):
     return TEAM_LOGOS.get(team, "")
 
-def get_headshot(player_id: int):
-    return f"https://cdn.nba.com/headshots/nba/latest/260x190/{player_id}.png"
+def fg_colors(s: pd.Series):
+    """CSS backgrounds for FG% cells: Red < 30, Yellow 30–40, Green > 40.
+    One np.select pass over the whole column, no per-cell callback."""
+    a = s.to_numpy(dtype=float)
+    return np.select(
+        [np.isnan(a), a < 0.30, a < 0.40],
+        ["", "background-color: #ff4d4d", "background-color: #ffe066"],
+        default="background-color: #69db7c",
+    )
 
-def fg_color(val):
-    """Color FG% cells: Red < 30, Yellow 30–40, Green > 40."""
-    if val is None or (isinstance(val, float) and np.isnan(val)):
-        return ""
-    try:
-        v = float(val)
-    except Exception:
-        return ""
-    if v < 0.30:
-        return "background-color: #ff4d4d"
-    if v < 0.40:
-        return "background-color: #ffe066"
-    return "background-color: #69db7c"
+# -------------------------------
+# VECTORIZED TABLE FORMATTING
+# -------------------------------
+def _fmt1(s: pd.Series):
+    """One-decimal string column, NaN -> empty."""
+    return np.where(s.isna(), "", s.round(1).astype(str))
+
+def _fmt2(s: pd.Series):
+    """Two-decimal string column, NaN -> empty."""
+    return np.where(s.isna(), "", s.round(2).astype(str))
+
+def _fmtpct(s: pd.Series):
+    """Whole-percent string column ('47%'), NaN -> empty."""
+    return np.where(s.isna(), "", (s * 100).round().astype("Int64").astype(str) + "%")
+
+# -------------------------------
+# NBA API SESSION (CONNECTION REUSE)
+# -------------------------------
+NBA_HEADERS = MappingProxyType({
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Referer": "https://stats.nba.com/",
+    "Origin": "https://www.nba.com",
+    "Accept": "application/json, text/plain, */*",
+    "x-nba-stats-origin": "stats",
+    "x-nba-stats-token": "true",
+})
+
+@st.cache_resource(show_spinner=False)
+def get_nba_session() -> requests.Session:
+    """One keep-alive session shared by every nba_api call, so repeat
+    requests reuse the pooled TLS connection instead of re-handshaking."""
+    session = requests.Session()
+    session.headers.update(NBA_HEADERS)
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=10,
+        # transport-level retries for rate limits and transient 5xx, under
+        # the endpoint-level nba_call_with_retries
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+        ),
+    ))
+    return session
+
+# nba_api routes requests through this class-level session when set
+nba_http.NBAStatsHTTP._session = get_nba_session()
 
 # -------------------------------
 # NBA API RELIABILITY (RETRIES)
 # -------------------------------
-def nba_call_with_retries(fn, tries=3, base_sleep=1.5):
+def nba_call_with_retries(fn, tries=3, base_sleep=0.5, max_sleep=4.0):
     last_err = None
     for i in range(tries):
         try:
             return fn()
+        except requests.exceptions.HTTPError as e:
+            # a 403/404 will not get better on retry; surface it right away
+            if e.response is not None and e.response.status_code in (403, 404):
+                raise
+            last_err = e
+        except requests.exceptions.InvalidURL:
+            raise
         except Exception as e:
             last_err = e
-            time.sleep(base_sleep * (i + 1))
+        if i < tries - 1:
+            # bounded exponential backoff with jitter, so retries spread
+            # out instead of landing in the same rate-limit window
+            time.sleep(min(max_sleep, base_sleep * 2 ** i) * (0.5 + random.random()))
     raise last_err
 
+# -------------------------------
+# ON-DISK CACHE (SURVIVES RESTARTS)
+# -------------------------------
+def load_frame_with_disk_cache(endpoint: str, season: str, fetch) -> pd.DataFrame:
+    """Two-tier cache under st.cache_data: serve a recent Parquet copy if
+    one exists, otherwise fetch from nba.com and write it atomically.
+    Unlike st.cache_data this survives worker restarts, so a redeploy
+    does not cost a fresh round-trip to stats.nba.com."""
+    path = CACHE_DIR / f"{endpoint}_{season}.parquet"
+
+    if path.exists() and time.time() - path.stat().st_mtime < CACHE_TTL_SECONDS:
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            pass  # unreadable/partial file: fall through to a fresh fetch
+
+    df = fetch()
+
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        tmp = path.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp, compression="zstd")
+        os.replace(tmp, path)
+        path.with_suffix(".json").write_text(json.dumps({
+            "endpoint": endpoint,
+            "season": season,
+            "fetched_at": time.time(),
+        }))
+    except Exception:
+        pass  # a read-only or full disk should never break the app
+
+    return df
+
 # -------------------------------
 # LOAD MAIN STATS (PER GAME)
 # -------------------------------
@@ -110,7 +246,9 @@ def load_main_stats(season: str) -> pd.DataFrame:
             per_mode_detailed="PerGame"
         ).get_data_frames()[0]
 
-    stats = nba_call_with_retries(_call)
+    stats = load_frame_with_disk_cache(
+        "player_stats", season, lambda: nba_call_with_retries(_call)
+    )
 
     numeric_cols = [
         "GP", "MIN",
@@ -119,10 +257,46 @@ def load_main_stats(season: str) -> pd.DataFrame:
         "FTM", "FTA", "FT_PCT",
         "PTS"
     ]
+
+    # the endpoint returns ~65 columns; carry only what the app reads so
+    # every later copy/sort/groupby touches a fifth of the data
+    keep_cols = ["PLAYER_ID", "PLAYER_NAME", "TEAM_ABBREVIATION"] + numeric_cols
+    stats = stats[[c for c in keep_cols if c in stats.columns]]
+
     for col in numeric_cols:
         if col in stats.columns:
             stats[col] = pd.to_numeric(stats[col], errors="coerce")
 
+    # narrower dtypes: counting stats as nullable Int32, rates as float32;
+    # halves the bytes every downstream round/sort/copy has to move
+    if "GP" in stats.columns:
+        stats["GP"] = stats["GP"].astype("Int32")
+    if "PLAYER_ID" in stats.columns:
+        stats["PLAYER_ID"] = pd.to_numeric(stats["PLAYER_ID"], errors="coerce").astype("Int32")
+    for col in numeric_cols:
+        if col != "GP" and col in stats.columns:
+            stats[col] = stats[col].astype("float32")
+
+    # headshot URLs built once as a vectorized string concat, so renders
+    # just read a column instead of formatting per rerun
+    stats["HEADSHOT_URL"] = (
+        "https://cdn.nba.com/headshots/nba/latest/260x190/"
+        + stats["PLAYER_ID"].astype(str)
+        + ".png"
+    )
+    stats["LOGO_URL"] = stats["TEAM_ABBREVIATION"].map(TEAM_LOGOS).fillna("")
+
+    # categorical codes make the team/player filters integer compares
+    # instead of per-row string compares
+    stats["TEAM_ABBREVIATION"] = stats["TEAM_ABBREVIATION"].astype("category")
+    stats["PLAYER_NAME"] = stats["PLAYER_NAME"].astype("category")
+
+    # sort once here: the team overview renders straight off this order,
+    # so its per-rerun path is just a mask + column selection
+    stats = stats.sort_values(
+        "PTS", ascending=False, na_position="last", kind="stable"
+    ).reset_index(drop=True)
+
     return stats
 
 # -------------------------------
@@ -138,100 +312,277 @@ def load_shot_data(season: str) -> pd.DataFrame:
             per_mode_detailed="PerGame"
         ).get_data_frames()[0]
 
-    df = nba_call_with_retries(_call)
+    def _fetch():
+        df = nba_call_with_retries(_call)
 
-    # flatten any tuple / MultiIndex columns
-    flat_cols = []
-    for c in df.columns:
-        if isinstance(c, tuple):
-            flat_cols.append("_".join([str(x) for x in c if x]))
-        else:
-            flat_cols.append(str(c))
-    df.columns = flat_cols
+        # flatten any tuple / MultiIndex columns (also keeps the frame
+        # Parquet-friendly for the disk cache)
+        df.columns = [
+            "_".join(str(x) for x in c if x) if isinstance(c, tuple) else str(c)
+            for c in df.columns
+        ]
+        return df
+
+    df = load_frame_with_disk_cache("shot_locations", season, _fetch)
+
+    # keep the player name plus the zone metric columns; the rest of the
+    # wide frame is never read
+    df = df[[
+        c for c in df.columns
+        if c == "PLAYER_NAME" or "FGM" in c or "FGA" in c or "FG_PCT" in c
+    ]]
 
     # convert numeric FGM/FGA/FG_PCT columns
     for c in df.columns:
         if "FGM" in c or "FGA" in c or "FG_PCT" in c:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float32")
+
+    if "PLAYER_NAME" in df.columns:
+        df["PLAYER_NAME"] = df["PLAYER_NAME"].astype("category")
 
     return df
 
 # -------------------------------
-# ZONE BREAKDOWN FOR ONE PLAYER
+# SEASON DETECTION (CHEAP PROBES)
 # -------------------------------
-def get_zones_for_player(player_name: str, shots_all: pd.DataFrame) -> pd.DataFrame:
-    df = shots_all.copy()
-
-    if "PLAYER_NAME" not in df.columns:
-        return pd.DataFrame()
+_STATS_URL = "https://stats.nba.com/stats/leaguedashplayerstats"
+
+# full required param set for the endpoint; the probe only varies Season
+_PROBE_PARAMS = MappingProxyType({
+    "College": "", "Conference": "", "Country": "", "DateFrom": "",
+    "DateTo": "", "Division": "", "DraftPick": "", "DraftYear": "",
+    "GameScope": "", "GameSegment": "", "Height": "", "LastNGames": "0",
+    "LeagueID": "00", "Location": "", "MeasureType": "Base", "Month": "0",
+    "OpponentTeamID": "0", "Outcome": "", "PORound": "0", "PaceAdjust": "N",
+    "PerMode": "PerGame", "Period": "0", "PlayerExperience": "",
+    "PlayerPosition": "", "PlusMinus": "N", "Rank": "N",
+    "SeasonSegment": "", "SeasonType": "Regular Season",
+    "ShotClockRange": "", "StarterBench": "", "TeamID": "0",
+    "VsConference": "", "VsDivision": "", "Weight": "",
+})
+
+def candidate_seasons_latest_first(count: int = 3) -> list:
+    """["2025-26", "2024-25", ...] starting from the season implied by
+    today's date (a new season tips off in October)."""
+    today = datetime.date.today()
+    start_year = today.year if today.month >= 10 else today.year - 1
+    return [f"{y}-{str(y + 1)[-2:]}" for y in range(start_year, start_year - count, -1)]
+
+def season_probe_has_data(season: str) -> bool:
+    """Cheap check that a season answers with rows: stream only the first
+    few KB of the stats payload instead of parsing the whole body."""
+    try:
+        resp = get_nba_session().get(
+            _STATS_URL,
+            params={**_PROBE_PARAMS, "Season": season},
+            timeout=5,
+            stream=True,
+        )
+        try:
+            if resp.status_code != 200:
+                return False
+            head = next(resp.iter_content(4096), b"").lstrip()
+            # headers precede rowSet, so an empty season shows up as
+            # '"rowSet":[]' inside the first chunk
+            return head.startswith(b"{") and b'"rowSet":[]' not in head
+        finally:
+            resp.close()
+    except Exception:
+        return False
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL_SECONDS)
+def detect_latest_season(default: str = DEFAULT_SEASON) -> str:
+    """Latest season with published stats, falling back to the configured
+    default when nba.com is unreachable. The candidates are probed
+    concurrently (each probe is a tiny streamed GET), and the newest
+    season that reports data wins — returning as soon as it is known,
+    without waiting on the older candidates."""
+    candidates = candidate_seasons_latest_first()
+    with ThreadPoolExecutor(max_workers=len(candidates)) as ex:
+        futures = [ex.submit(season_probe_has_data, s) for s in candidates]
+        for season, future in zip(candidates, futures):
+            if future.result():
+                return season
+    return default
 
-    df = df[df["PLAYER_NAME"] == player_name]
-    if df.empty:
-        return pd.DataFrame()
+# -------------------------------
+# SIDEBAR PLAYER LISTS (PER SEASON)
+# -------------------------------
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL_SECONDS)
+def build_team_player_index(season: str) -> dict:
+    """{team: sorted players} built once per season, so the sidebar does
+    a dict lookup instead of a filter + unique + sort on every rerun."""
+    stats = load_main_stats(season)
+    index = {
+        team: sorted(group.dropna().unique().tolist())
+        for team, group in stats.groupby("TEAM_ABBREVIATION", observed=True)["PLAYER_NAME"]
+    }
+    index["All"] = sorted(stats["PLAYER_NAME"].dropna().unique().tolist())
+    return index
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL_SECONDS)
+def build_team_list(season: str) -> list:
+    stats = load_main_stats(season)
+    return ["All"] + sorted(stats["TEAM_ABBREVIATION"].dropna().unique().tolist())
 
-    row = df.iloc[0]
+# -------------------------------
+# ZONE BREAKDOWN FOR ONE PLAYER
+# -------------------------------
+# keyed on the season string, so the wide frame is never hashed to build
+# the cache key (load_shot_data already caches the frame per season)
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL_SECONDS)
+def build_player_zone_index(season: str) -> dict:
+    """Parse the wide shot-locations frame once into
+    {player_name: {"zone": ..., "FGM": ..., "FGA": ..., "FG_PCT": ...}}
+    NumPy arrays, so each player selection is a dict hit instead of a
+    full-frame scan."""
+    shots_all = load_shot_data(season)
+
+    if "PLAYER_NAME" not in shots_all.columns:
+        return {}
 
     shot_cols = [
-        c for c in df.columns
+        c for c in shots_all.columns
         if c.endswith("_FGM") or c.endswith("_FGA") or c.endswith("_FG_PCT")
     ]
+    if not shot_cols:
+        return {}
 
-    zone_records = {}
-
-    for col in shot_cols:
-        val = row[col]
-
-        if col.endswith("_FG_PCT"):
-            zone = col.replace("_FG_PCT", "")
-            metric = "FG_PCT"
-        elif col.endswith("_FGM"):
-            zone = col.replace("_FGM", "")
-            metric = "FGM"
-        else:  # _FGA
-            zone = col.replace("_FGA", "")
-            metric = "FGA"
-
-        rec = zone_records.setdefault(zone, {
-            "zone": zone,
-            "FGM": 0.0,
-            "FGA": 0.0,
-            "FG_PCT": np.nan
-        })
-
-        if metric in ["FGM", "FGA"] and pd.notna(val):
-            rec[metric] += float(val)
-        elif metric == "FG_PCT" and pd.notna(val):
-            rec["FG_PCT"] = float(val)
+    # split "Zone_Name_FGM" style columns into (zone, metric) in one
+    # vectorized pass instead of looping over cells in Python
+    parsed = pd.Index(shot_cols).str.extract(r"^(.+)_(FGM|FGA|FG_PCT)$")
 
-    zp = pd.DataFrame(zone_records.values())
-
-    # drop Backcourt
-    zp = zp[zp["zone"] != "Backcourt"].copy()
+    wide = shots_all.set_index("PLAYER_NAME")[shot_cols]
+    wide.columns = pd.MultiIndex.from_arrays(
+        [parsed[0].values, parsed[1].values], names=["zone", "metric"]
+    )
 
-    total_fga = zp["FGA"].sum()
+    tidy = wide.stack(level="zone").reset_index()
+    tidy = tidy[tidy["zone"] != "Backcourt"]
+
+    for metric in ["FGM", "FGA", "FG_PCT"]:
+        if metric not in tidy.columns:
+            tidy[metric] = np.nan
+    tidy[["FGM", "FGA"]] = tidy[["FGM", "FGA"]].fillna(0.0)
+
+    # derived metrics for every player in one pass, so a player click is
+    # a pure lookup with no arithmetic left on the rerun path
+    fgm = tidy["FGM"].to_numpy(dtype=float)
+    fga = tidy["FGA"].to_numpy(dtype=float)
+    pts = fgm * tidy["zone"].map(ZONE_PTS).fillna(2).to_numpy(dtype=float)
+
+    # masked divisions straight into preallocated buffers: no np.where
+    # temporaries and no divide-by-zero warnings to suppress
+    pts_per_shot = np.full_like(fga, np.nan)
+    np.divide(pts, fga, out=pts_per_shot, where=fga > 0)
+
+    total_fga = (
+        tidy.groupby("PLAYER_NAME", sort=False, observed=True)["FGA"]
+        .transform("sum")
+        .to_numpy(dtype=float)
+    )
+    shot_share = np.full_like(fga, np.nan)
+    np.divide(fga, total_fga, out=shot_share, where=total_fga > 0)
+
+    tidy["PTS"] = pts
+    tidy["PTS_per_shot"] = pts_per_shot
+    tidy["Shot Share"] = shot_share
+
+    return {
+        name: {
+            "zone": g["zone"].to_numpy(),
+            "FGM": g["FGM"].to_numpy(dtype=float),
+            "FGA": g["FGA"].to_numpy(dtype=float),
+            "FG_PCT": g["FG_PCT"].to_numpy(dtype=float),
+            "PTS": g["PTS"].to_numpy(),
+            "PTS_per_shot": g["PTS_per_shot"].to_numpy(),
+            "Shot Share": g["Shot Share"].to_numpy(),
+        }
+        for name, g in tidy.groupby("PLAYER_NAME", sort=False, observed=True)
+    }
 
-    zp["pts_val"] = np.where(zp["zone"].str.contains("3"), 3, 2)
-    zp["PTS"] = zp["FGM"] * zp["pts_val"]
-    zp["PTS_per_shot"] = np.where(zp["FGA"] > 0, zp["PTS"] / zp["FGA"], np.nan)
-    zp["Shot Share"] = np.where(total_fga > 0, zp["FGA"] / total_fga, np.nan)
+def get_zones_for_player(player_name: str, season: str) -> pd.DataFrame:
+    rec = build_player_zone_index(season).get(player_name)
+    if rec is None:
+        return pd.DataFrame()
 
-    return zp
+    return pd.DataFrame({
+        "zone": rec["zone"],
+        "FGM": rec["FGM"],
+        "FGA": rec["FGA"],
+        "FG_PCT": rec["FG_PCT"],
+        "PTS": rec["PTS"],
+        "PTS_per_shot": rec["PTS_per_shot"],
+        "Shot Share": rec["Shot Share"],
+    })
 
 # -------------------------------
 # LOAD DATA (FRESH PER TTL / REFRESH BUTTON)
 # -------------------------------
+TARGET_SEASON = detect_latest_season()
+SEASON_LABEL = f"{TARGET_SEASON} Regular Season"
+
 try:
-    stats_all = load_main_stats(TARGET_SEASON)
-    shots_all = load_shot_data(TARGET_SEASON)
+    # the two endpoint fetches are independent and I/O-bound, so overlap
+    # them instead of paying both round-trips back to back
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        stats_future = ex.submit(load_main_stats, TARGET_SEASON)
+        shots_future = ex.submit(load_shot_data, TARGET_SEASON)
+        stats_all = stats_future.result()
+        shots_all = shots_future.result()
 except Exception as e:
     st.error("NBA API failed to load. Try refresh, or wait a minute and try again.")
     st.exception(e)
     st.stop()
 
+# the season probe only sniffs the head of the payload, so it can pass a
+# season that turns out to be empty; walk the older candidates before
+# giving up rather than rendering with no players
+if stats_all.empty:
+    for season in candidate_seasons_latest_first():
+        if season == TARGET_SEASON:
+            continue
+        try:
+            stats_candidate = load_main_stats(season)
+        except Exception:
+            continue
+        if not stats_candidate.empty:
+            stats_all = stats_candidate
+            shots_all = load_shot_data(season)
+            TARGET_SEASON = season
+            SEASON_LABEL = f"{TARGET_SEASON} Regular Season"
+            break
+    if stats_all.empty:
+        st.error("NBA API returned no player data for any recent season. "
+                 "Try refresh, or wait a minute and try again.")
+        st.stop()
+
+# -------------------------------
+# CATEGORY-CODE FILTER MASKS
+# -------------------------------
+# hoisted once per rerun: the row filters below compare int8/int16 codes
+# instead of Python strings
+_team_cats = stats_all["TEAM_ABBREVIATION"].cat.categories
+_team_codes = stats_all["TEAM_ABBREVIATION"].cat.codes.to_numpy()
+_player_cats = stats_all["PLAYER_NAME"].cat.categories
+_player_codes = stats_all["PLAYER_NAME"].cat.codes.to_numpy()
+
+def _codes_mask(codes, cats, value) -> np.ndarray:
+    try:
+        return codes == cats.get_loc(value)
+    except KeyError:
+        return np.zeros(len(codes), dtype=bool)
+
+def team_mask(team: str) -> np.ndarray:
+    return _codes_mask(_team_codes, _team_cats, team)
+
+def player_mask(name: str) -> np.ndarray:
+    return _codes_mask(_player_codes, _player_cats, name)
+
 # -------------------------------
 # SIDEBAR – TEAM & PLAYER SELECT
 # -------------------------------
-teams = ["All"] + sorted(stats_all["TEAM_ABBREVIATION"].dropna().unique())
+teams = build_team_list(TARGET_SEASON)
 
 with st.sidebar:
     st.markdown("### Filters")
@@ -242,12 +593,7 @@ with st.sidebar:
         if logo_url_sb:
             st.image(logo_url_sb, width=70)
 
-    if team_sel == "All":
-        players = sorted(stats_all["PLAYER_NAME"].dropna().unique())
-    else:
-        players = sorted(
-            stats_all[stats_all["TEAM_ABBREVIATION"] == team_sel]["PLAYER_NAME"].dropna().unique()
-        )
+    players = build_team_player_index(TARGET_SEASON).get(team_sel, [])
 
     player_sel = st.selectbox("Choose a player:", players)
 
@@ -261,24 +607,22 @@ with st.sidebar:
 # PLAYER HEADER
 # -------------------------------
 if team_sel == "All":
-    p_rows = stats_all[stats_all["PLAYER_NAME"] == player_sel]
+    mask = player_mask(player_sel)
 else:
-    p_rows = stats_all[
-        (stats_all["PLAYER_NAME"] == player_sel) &
-        (stats_all["TEAM_ABBREVIATION"] == team_sel)
-    ]
+    mask = player_mask(player_sel) & team_mask(team_sel)
+p_rows = stats_all.iloc[np.flatnonzero(mask)]
 if p_rows.empty:
-    p_rows = stats_all[stats_all["PLAYER_NAME"] == player_sel]
+    p_rows = stats_all.iloc[np.flatnonzero(player_mask(player_sel))]
 
 player_row = p_rows.iloc[0]
 
-st.title("NBA Shooting – NBA.com 2025-26")
+st.title(f"NBA Shooting – NBA.com {TARGET_SEASON}")
 
 col1, col2 = st.columns([1, 4])
 
 with col1:
-    st.image(get_headshot(int(player_row["PLAYER_ID"])), width=170)
-    logo_url = get_team_logo(player_row["TEAM_ABBREVIATION"])
+    st.image(player_row["HEADSHOT_URL"], width=170)
+    logo_url = player_row["LOGO_URL"]
     if logo_url:
         st.image(logo_url, width=90)
 
@@ -302,7 +646,7 @@ tab1, tab2 = st.tabs(["Zone breakdown", "Team overview"])
 
 # ----- TAB 1: ZONE BREAKDOWN -----
 with tab1:
-    zp = get_zones_for_player(player_sel, shots_all)
+    zp = get_zones_for_player(player_sel, TARGET_SEASON)
 
     if zp.empty:
         st.error("No zone data available for this player.")
@@ -323,7 +667,9 @@ with tab1:
         df_zone["FTA"] = np.nan
         df_zone["FT%"] = np.nan
 
-        ft_row = {
+        # single-row append via loc (df_zone has a RangeIndex); concat
+        # would re-allocate and copy the whole frame for one row
+        df_zone.loc[len(df_zone)] = {
             "Zone": "Free Throw",
             "FGM": np.nan,
             "FGA": np.nan,
@@ -335,55 +681,72 @@ with tab1:
             "FTA": player_row["FTA"],
             "FT%": player_row["FT_PCT"],
         }
-        df_zone = pd.concat([df_zone, pd.DataFrame([ft_row])], ignore_index=True)
 
         df_zone = df_zone[[
             "Zone", "FGM", "FGA", "PTS/shot", "FG%", "PTS", "Shot Share",
             "FTM", "FTA", "FT%"
         ]]
 
-        styled = (
-            df_zone.style
-            .applymap(fg_color, subset=["FG%"])
-            .format({
-                "FGM": lambda v: "" if pd.isna(v) else f"{v:.1f}",
-                "FGA": lambda v: "" if pd.isna(v) else f"{v:.1f}",
-                "PTS/shot": lambda v: "" if pd.isna(v) else f"{v:.2f}",
-                "PTS": lambda v: "" if pd.isna(v) else f"{v:.1f}",
-                "FG%": lambda v: "" if pd.isna(v) else f"{int(round(v * 100))}%",
-                "Shot Share": lambda v: "" if pd.isna(v) else f"{int(round(v * 100))}%",
-                "FTM": lambda v: "" if pd.isna(v) else f"{v:.1f}",
-                "FTA": lambda v: "" if pd.isna(v) else f"{v:.1f}",
-                "FT%": lambda v: "" if pd.isna(v) else f"{int(round(v * 100))}%",
-            })
-        )
+        # FG% background colors, computed for the whole column at once
+        fg_css = fg_colors(df_zone["FG%"])
+
+        # pre-format everything to strings in vectorized passes so the
+        # Styler only has to attach the precomputed FG% backgrounds
+        df_display = pd.DataFrame({
+            "Zone": df_zone["Zone"],
+            "FGM": _fmt1(df_zone["FGM"]),
+            "FGA": _fmt1(df_zone["FGA"]),
+            "PTS/shot": _fmt2(df_zone["PTS/shot"]),
+            "FG%": _fmtpct(df_zone["FG%"]),
+            "PTS": _fmt1(df_zone["PTS"]),
+            "Shot Share": _fmtpct(df_zone["Shot Share"]),
+            "FTM": _fmt1(df_zone["FTM"]),
+            "FTA": _fmt1(df_zone["FTA"]),
+            "FT%": _fmtpct(df_zone["FT%"]),
+        })
+
+        styled = df_display.style.apply(lambda _col: fg_css, subset=["FG%"])
 
         # Streamlit supports Styler in dataframe in most cases
         st.dataframe(styled, use_container_width=True)
 
 # ----- TAB 2: TEAM OVERVIEW -----
-with tab2:
+@st.fragment
+def render_team_overview(team_sel: str):
+    """Isolated fragment: interactions inside the overview rerun only
+    this body, not the whole script (and the zone tab with it)."""
     if team_sel == "All":
-        team_df = stats_all.copy()
+        team_df = stats_all
     else:
-        team_df = stats_all[stats_all["TEAM_ABBREVIATION"] == team_sel].copy()
-
-    team_df = team_df.sort_values("PTS", ascending=False)
-
-    df_out = team_df[[
-        "PLAYER_NAME", "TEAM_ABBREVIATION", "GP", "MIN", "PTS", "FG_PCT", "FG3_PCT", "FT_PCT"
-    ]].copy()
-
-    df_out["GP"] = df_out["GP"].astype("Int64")
-    df_out["MIN"] = df_out["MIN"].round(1)
-    df_out["PTS"] = df_out["PTS"].round(1)
-    df_out["FG%"] = (df_out["FG_PCT"] * 100).round(1)
-    df_out["3P%"] = (df_out["FG3_PCT"] * 100).round(1)
-    df_out["FT%"] = (df_out["FT_PCT"] * 100).round(1)
-
-    df_out.drop(columns=["FG_PCT", "FG3_PCT", "FT_PCT"], inplace=True)
-    df_out.rename(columns={"PLAYER_NAME": "Player", "TEAM_ABBREVIATION": "Team"}, inplace=True)
+        team_df = stats_all.iloc[np.flatnonzero(team_mask(team_sel))]
+
+    # stats_all is already PTS-sorted by load_main_stats
+
+    # pull everything out as ndarrays and build df_out in one constructor
+    # call instead of a chain of per-column assignments
+    urls = team_df["TEAM_ABBREVIATION"].map(TEAM_LOGOS)
+    df_out = pd.DataFrame({
+        "Logo": urls.to_numpy(),
+        "Player": team_df["PLAYER_NAME"].to_numpy(),
+        "Team": team_df["TEAM_ABBREVIATION"].to_numpy(),
+        "GP": pd.array(team_df["GP"].to_numpy(), dtype="Int32"),
+        "MIN": np.round(team_df["MIN"].to_numpy(dtype=np.float64), 1),
+        "PTS": np.round(team_df["PTS"].to_numpy(dtype=np.float64), 1),
+        "FG%": np.round(team_df["FG_PCT"].to_numpy(dtype=np.float64) * 100, 1),
+        "3P%": np.round(team_df["FG3_PCT"].to_numpy(dtype=np.float64) * 100, 1),
+        "FT%": np.round(team_df["FT_PCT"].to_numpy(dtype=np.float64) * 100, 1),
+    })
+
+    # typed image column: the frontend renders the logo URLs directly,
+    # no Python-side HTML assembly or to_html serialization
+    st.dataframe(
+        df_out,
+        column_config={"Logo": st.column_config.ImageColumn("Logo", width="small")},
+        hide_index=True,
+        use_container_width=True,
+    )
 
-    st.dataframe(df_out, use_container_width=True, hide_index=True)
+with tab2:
+    render_team_overview(team_sel)
 
 